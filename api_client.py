@@ -0,0 +1,12 @@
+import numpy as np
+import requests
+
+from classifier import class_names
+
+
+# Send one upload to the inference API (server.py) and return the probabilities in class_names order
+def predict_remote(api_url, data, filename='upload.jpg', timeout=60):
+    response = requests.post(api_url.rstrip('/') + '/predict', files={'file': (filename, data)}, timeout=timeout)
+    response.raise_for_status()
+    probabilities = response.json()['probabilities']
+    return np.array([probabilities[name] for name in class_names], dtype=np.float32)
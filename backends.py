@@ -0,0 +1,88 @@
+import os
+import threading
+
+import numpy as np
+
+# Every backend exposes the subset of the Keras model API the rest of the app relies on:
+# predict(batch, batch_size=None, verbose=0) -> probabilities, and input_shape.
+
+
+class KerasBackend:
+    def __init__(self, path):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(path)
+        self.input_shape = self.model.input_shape
+        self.weights = self.model.weights
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return self.model.predict(batch, batch_size=batch_size or len(batch), verbose=verbose)
+
+
+class TFLiteBackend:
+    # Prefers the small tflite-runtime wheel and falls back to the interpreter bundled with TensorFlow
+    def __init__(self, path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads or os.cpu_count())
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in self.input['shape'][1:])
+        self._batch_size = None
+        # An Interpreter is not thread-safe, and the scheduler worker and multi-crop requests may call predict
+        # concurrently
+        self._lock = threading.Lock()
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = quantize(np.asarray(batch, dtype=np.float32), self.input)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self.input['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output['index'])
+        return dequantize(output, self.output)
+
+
+class OnnxBackend:
+    def __init__(self, path, num_threads=None):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count()
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_shape = (None,) + tuple(d if isinstance(d, int) else None for d in self.session.get_inputs()[0].shape[1:])
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+# Map float inputs onto an integer tensor (fully int8-quantized TFLite models), no-op for float tensors
+def quantize(batch, details):
+    if details['dtype'] in (np.float32, np.float16):
+        return batch.astype(details['dtype'])
+    scale, zero_point = details['quantization']
+    info = np.iinfo(details['dtype'])
+    return np.clip(np.rint(batch / scale + zero_point), info.min, info.max).astype(details['dtype'])
+
+
+def dequantize(output, details):
+    if details['dtype'] in (np.float32, np.float16):
+        return output.astype(np.float32)
+    scale, zero_point = details['quantization']
+    return (output.astype(np.float32) - zero_point) * scale
+
+
+BACKENDS = {'keras': KerasBackend, 'tflite': TFLiteBackend, 'onnx': OnnxBackend}
+SUFFIXES = {'.h5': 'keras', '.keras': 'keras', '.tflite': 'tflite', '.onnx': 'onnx'}
+
+
+# Pick the backend from TEMPLE_BACKEND, or else from the model file suffix
+def load_backend(path, backend=None):
+    backend = backend or os.environ.get('TEMPLE_BACKEND') or SUFFIXES.get(os.path.splitext(path)[1].lower(), 'keras')
+    if backend not in BACKENDS:
+        raise ValueError(f'unknown backend {backend!r}, expected one of {sorted(BACKENDS)}')
+    return BACKENDS[backend](path)
@@ -0,0 +1,269 @@
+"""Classify whole folders of temple photos without the Streamlit UI.
+
+    python batch_classify.py photos/ "archive/**/*.jpg" -o results.csv --batch-size 32 --workers 8
+
+Results are appended as each batch finishes; re-running the same command skips images already in the output.
+"""
+import argparse
+import collections
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from classifier import MODEL_PATH, class_names, top_k
+from preprocessing import IMAGE_SIZE, preprocess_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+# Yield image paths from directories (walked recursively, in a stable order) and glob patterns.
+# Paths are normalized so the same file reached through overlapping inputs can be recognised.
+def iter_images(inputs):
+    for source in inputs:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.normpath(os.path.join(root, name))
+        else:
+            for path in sorted(glob.iglob(source, recursive=True)):
+                if os.path.isfile(path):
+                    yield os.path.normpath(path)
+
+
+# Runs in the worker processes: decode + preprocess one file, reporting failures instead of raising
+def decode(path):
+    try:
+        with open(path, 'rb') as f:
+            return path, preprocess_image(f), None
+    except Exception as exc:
+        return path, None, f'{type(exc).__name__}: {exc}'
+
+
+# Decode in a process pool while keeping at most `window` images in flight, so memory stays flat
+# however many files there are
+def decode_stream(paths, workers, window):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for path in paths:
+            pending.append(pool.submit(decode, path))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def result_columns(k):
+    columns = ['path', 'predicted_class']
+    for rank in range(1, k + 1):
+        columns += [f'class_{rank}', f'probability_{rank}']
+    return columns + ['error']
+
+
+def result_row(path, probabilities, k, error=None):
+    row = {'path': path, 'predicted_class': None, 'error': error}
+    if probabilities is not None:
+        ranked = top_k(probabilities, k)
+        row['predicted_class'] = ranked[0][0]
+        for rank, (name, probability) in enumerate(ranked, 1):
+            row[f'class_{rank}'] = name
+            row[f'probability_{rank}'] = probability
+    return row
+
+
+class CsvWriter:
+    def __init__(self, path, k):
+        self.columns = result_columns(k)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.columns)
+        if new:
+            self.writer.writeheader()
+
+    @staticmethod
+    def done_paths(path):
+        if not os.path.exists(path):
+            return set()
+        with open(path, newline='', encoding='utf-8') as f:
+            return {row['path'] for row in csv.DictReader(f) if row.get('path') and not row.get('error')}
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, k):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def done_paths(path):
+        if not os.path.exists(path):
+            return set()
+        done = set()
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interruption is simply classified again
+                if row.get('path') and not row.get('error'):
+                    done.add(row['path'])
+        return done
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # Parquet files can't be appended to, so the output is a directory with one part file per flush
+    def __init__(self, path, k, rows_per_part=10000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            sys.exit('Parquet output needs pyarrow (pip install pyarrow)')
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.path = path
+        self.columns = result_columns(k)
+        self.rows_per_part = rows_per_part
+        self.buffer = []
+        os.makedirs(path, exist_ok=True)
+        self.part = len(glob.glob(os.path.join(path, 'part-*.parquet')))
+
+    @staticmethod
+    def done_paths(path):
+        parts = sorted(glob.glob(os.path.join(path, 'part-*.parquet')))
+        if not parts:
+            return set()
+        import pyarrow.parquet
+        done = set()
+        for part in parts:
+            table = pyarrow.parquet.read_table(part, columns=['path', 'error']).to_pydict()
+            done.update(path for path, error in zip(table['path'], table['error']) if not error)
+        return done
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        table = self.pa.Table.from_pylist([{c: row.get(c) for c in self.columns} for row in self.buffer])
+        # Write to a temporary name first so an interrupted run never leaves a truncated part behind
+        target = os.path.join(self.path, f'part-{self.part:05d}.parquet')
+        self.pq.write_table(table, target + '.tmp')
+        os.replace(target + '.tmp', target)
+        self.part += 1
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+
+def output_format(path, fmt):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return extension if extension in WRITERS else 'csv'
+
+
+def load_model(path):
+    # Imported here so --help and argument errors don't pay for TensorFlow
+    from model_registry import ModelRegistry
+    return ModelRegistry(max_models=1).get(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classify directories or globs of temple images in batches.')
+    parser.add_argument('inputs', nargs='+', help='directories (searched recursively) or glob patterns')
+    parser.add_argument('-o', '--output', required=True, help='output file (.csv/.jsonl) or directory (.parquet)')
+    parser.add_argument('--format', choices=sorted(WRITERS), help='output format (default: from the output suffix)')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--no-resume', action='store_true', help='classify every image even if already in the output')
+    args = parser.parse_args(argv)
+
+    k = min(args.top_k, len(class_names))
+    writer_class = WRITERS[output_format(args.output, args.format)]
+    # Rows with an error don't count as done, so failed files are retried on resume (the output then holds both
+    # rows; the later one is the current result)
+    done = set() if args.no_resume else {os.path.normpath(path) for path in writer_class.done_paths(args.output)}
+    if done:
+        print(f'Resuming: {len(done)} images already classified', file=sys.stderr)
+
+    # Each file once, even when inputs overlap (e.g. a directory and a glob inside it)
+    def pending():
+        for path in iter_images(args.inputs):
+            if path not in done:
+                done.add(path)
+                yield path
+
+    paths = pending()
+
+    model = load_model(args.model)
+    writer = writer_class(args.output, k)
+    # Fixed-size input buffer: a short final batch is zero-padded so the model always sees the same shape
+    batch = np.zeros((args.batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32)
+    batch_paths, rows = [], []
+    classified = failed = 0
+    start = last_report = time.perf_counter()
+
+    def flush():
+        nonlocal classified
+        if batch_paths:
+            probabilities = model.predict(batch, batch_size=args.batch_size, verbose=0)
+            rows.extend(result_row(path, probabilities[i], k) for i, path in enumerate(batch_paths))
+            classified += len(batch_paths)
+            batch_paths.clear()
+        writer.write(rows)
+        rows.clear()
+
+    try:
+        for path, image, error in decode_stream(paths, args.workers, window=4 * args.batch_size):
+            if error is not None:
+                rows.append(result_row(path, None, k, error))
+                failed += 1
+                continue
+            batch[len(batch_paths)] = image[0]
+            batch_paths.append(path)
+            if len(batch_paths) == args.batch_size:
+                flush()
+                now = time.perf_counter()
+                if now - last_report >= 10:
+                    print(f'{classified} images, {classified / (now - start):.1f} images/s', file=sys.stderr)
+                    last_report = now
+        batch[len(batch_paths):] = 0
+        flush()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'Classified {classified} images ({failed} failed) in {elapsed:.1f}s, '
+          f'{classified / elapsed if elapsed else 0:.1f} images/s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""Benchmark the upload hot path stage by stage: decode, fit, normalize, model.predict and prediction_cls.
+
+    python benchmark.py -o bench.json
+    python benchmark.py --corpus photos/ --batch-sizes 1 8 32 -o bench.json --compare baseline.json
+
+Runs offline on CPU. Without a model file a randomly initialized VGG16-shaped stand-in with the same
+150x150x3 input is used, so timings stay comparable between machines and commits.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from batch_classify import iter_images
+from classifier import MODEL_PATH, class_names, prediction_cls
+from preprocessing import IMAGE_SIZE, decode_image, fit_image, to_array
+
+STAGES = ('decode', 'fit', 'normalize')
+
+
+def peak_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1000.0
+    return {
+        'n': len(samples),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'p99_ms': float(np.percentile(samples, 99)),
+    }
+
+
+# A photo-like JPEG: smooth low-frequency content plus sensor-style noise, 4:3 like phone cameras
+def synthetic_jpeg(megapixels, rng, quality=90):
+    width = int(round((megapixels * 1e6 * 4 / 3) ** 0.5))
+    height = int(round(width * 3 / 4))
+    base = Image.fromarray(rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)).resize((width, height), Image.BILINEAR)
+    noise = rng.integers(-12, 13, (height, width, 3), dtype=np.int16)
+    pixels = np.clip(np.asarray(base, dtype=np.int16) + noise, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+# Time each preprocessing stage separately on one encoded image
+def time_preprocessing(data):
+    timings = {}
+    start = time.perf_counter()
+    image = decode_image(io.BytesIO(data))
+    image.load()
+    timings['decode'] = time.perf_counter() - start
+    start = time.perf_counter()
+    fitted = fit_image(image)
+    timings['fit'] = time.perf_counter() - start
+    start = time.perf_counter()
+    array = to_array(fitted)
+    timings['normalize'] = time.perf_counter() - start
+    return timings, array
+
+
+def bench_preprocessing(corpus, repeats):
+    results, arrays = [], []
+    for label, images in corpus:
+        stage_samples = {stage: [] for stage in STAGES}
+        totals = []
+        for _ in range(repeats):
+            for data in images:
+                timings, array = time_preprocessing(data)
+                for stage in STAGES:
+                    stage_samples[stage].append(timings[stage])
+                totals.append(sum(timings.values()))
+                arrays.append(array)
+        results.append({
+            'input': label,
+            'stages': {stage: summarize(samples) for stage, samples in stage_samples.items()},
+            'total': summarize(totals),
+            'images_per_s': len(totals) / sum(totals),
+            'peak_rss_bytes': peak_rss_bytes(),
+        })
+    return results, np.concatenate(arrays)
+
+
+def standin_model():
+    import tensorflow as tf
+    base = tf.keras.applications.VGG16(weights=None, include_top=False, input_shape=IMAGE_SIZE + (3,))
+    return tf.keras.Sequential([
+        base,
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(256, activation='relu'),
+        tf.keras.layers.Dense(len(class_names), activation='softmax'),
+    ])
+
+
+def load_benchmark_model(path):
+    if os.path.exists(path):
+        from backends import load_backend
+        return load_backend(path), path
+    print(f'{path} not found, using a randomly initialized VGG16-shaped stand-in', file=sys.stderr)
+    return standin_model(), 'standin-vgg16'
+
+
+def bench_inference(model, arrays, batch_sizes, iterations):
+    results = []
+    for batch_size in batch_sizes:
+        batch = np.resize(arrays, (batch_size,) + arrays.shape[1:]).astype(np.float32)
+        model.predict(batch, batch_size=batch_size, verbose=0)  # warm-up / graph tracing for this shape
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model.predict(batch, batch_size=batch_size, verbose=0)
+            samples.append(time.perf_counter() - start)
+        results.append({
+            'batch_size': batch_size,
+            'predict': summarize(samples),
+            'images_per_s': batch_size * len(samples) / sum(samples),
+            'peak_rss_bytes': peak_rss_bytes(),
+        })
+    return results
+
+
+def bench_prediction_cls(iterations, rng):
+    predictions = rng.random((iterations, len(class_names)), dtype=np.float32)
+    samples = []
+    for prediction in predictions:
+        start = time.perf_counter()
+        prediction_cls(prediction, class_names)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def environment():
+    import PIL
+    info = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+    }
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        info['commit'] = None
+    return info
+
+
+# Print the p50 change of every stage against an earlier run
+def compare(report, baseline_path, out=None):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def p50s(result):
+        values = {}
+        for entry in result.get('preprocessing', []):
+            for stage, summary in entry['stages'].items():
+                values[f"{entry['input']} {stage}"] = summary['p50_ms']
+        for entry in result.get('inference', []):
+            values[f"predict batch={entry['batch_size']}"] = entry['predict']['p50_ms']
+        if 'prediction_cls' in result:
+            values['prediction_cls'] = result['prediction_cls']['p50_ms']
+        return values
+
+    old, new = p50s(baseline), p50s(report)
+    for key in new:
+        if key in old and old[key] > 0:
+            print(f'{key:40s} {old[key]:10.3f} ms -> {new[key]:10.3f} ms  ({new[key] / old[key] - 1:+.1%})', file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark preprocessing and inference of the temple classifier.')
+    parser.add_argument('--corpus', help='folder of real images (default: synthetic JPEGs)')
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[1, 4, 12, 24])
+    parser.add_argument('--images', type=int, default=5, help='synthetic images per resolution')
+    parser.add_argument('--repeats', type=int, default=3, help='passes over the corpus')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 16, 32])
+    parser.add_argument('--iterations', type=int, default=20, help='timed predict calls per batch size')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--skip-inference', action='store_true', help='only benchmark preprocessing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', help='earlier JSON report to compare against')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    if args.corpus:
+        paths = list(iter_images([args.corpus]))
+        corpus = [(args.corpus, [open(path, 'rb').read() for path in paths])]
+    else:
+        corpus = [(f'{mp:g}MP', [synthetic_jpeg(mp, rng) for _ in range(args.images)]) for mp in args.megapixels]
+
+    report = {'environment': environment(), 'config': vars(args)}
+    report['preprocessing'], arrays = bench_preprocessing(corpus, args.repeats)
+    if not args.skip_inference:
+        model, report['model'] = load_benchmark_model(args.model)
+        report['inference'] = bench_inference(model, arrays, args.batch_sizes, args.iterations)
+    report['prediction_cls'] = bench_prediction_cls(1000, rng)
+    report['peak_rss_bytes'] = peak_rss_bytes()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        # Keep stdout pure JSON when the report itself goes there
+        compare(report, args.compare, out=None if args.output else sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
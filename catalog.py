@@ -0,0 +1,109 @@
+"""Temple descriptions shown under a prediction, loaded from catalog/ instead of being hard-coded in app.py.
+
+catalog/index.json maps every class name to its entry file and holds the shared card styling. The index is
+read and checked against class_names once per process; entry files are only read (and validated) the first
+time their temple is predicted, and the rendered Markdown/HTML is memoized per class and language.
+
+    python catalog.py      # validate every entry, e.g. before deploying a new temple
+"""
+import html
+import json
+import os
+import sys
+from functools import lru_cache
+
+from classifier import class_names
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog')
+
+SIDEBAR_KINDS = ('success', 'info', 'warning', 'error')
+
+
+class CatalogError(ValueError):
+    pass
+
+
+def _require(condition, message):
+    if not condition:
+        raise CatalogError(message)
+
+
+class RenderedTemple:
+    # Everything app.py needs to show one temple, ready to hand to st.markdown
+    def __init__(self, sidebar, title, sections):
+        self.sidebar = sidebar
+        self.title = title
+        self.sections = sections  # [(heading markdown, card html), ...]
+
+
+class TempleCatalog:
+    def __init__(self, directory=CATALOG_DIR, required=class_names):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        self.card_style = index['card_style']
+        self.link_style = index['link_style']
+        self.files = index['temples']
+        missing = [name for name in required if name not in self.files]
+        _require(not missing, f'catalog has no entry for {missing}')
+        for name, filename in self.files.items():
+            _require(os.path.isfile(os.path.join(directory, filename)), f'{name}: {filename} does not exist')
+        # Memoize per instance so a reloaded catalog never serves stale fragments
+        self.entry = lru_cache(maxsize=None)(self._load_entry)
+        self.section = lru_cache(maxsize=None)(self._render_section)
+        self.rendered = lru_cache(maxsize=None)(self._render)
+
+    def __contains__(self, class_name):
+        return class_name in self.files
+
+    def languages(self, class_name):
+        return [section['language'] for section in self.entry(class_name)['sections']]
+
+    def validate_all(self):
+        for class_name in self.files:
+            self.rendered(class_name)
+        return len(self.files)
+
+    def _load_entry(self, class_name):
+        _require(class_name in self.files, f'unknown temple {class_name!r}')
+        path = os.path.join(self.directory, self.files[class_name])
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+        _require(isinstance(entry.get('title'), str), f'{path}: missing title')
+        _require(entry.get('sidebar') in SIDEBAR_KINDS, f'{path}: sidebar must be one of {SIDEBAR_KINDS}')
+        _require(entry.get('sections'), f'{path}: no sections')
+        for section in entry['sections']:
+            for key in ('language', 'heading', 'paragraphs', 'source'):
+                _require(key in section, f'{path}: section without {key!r}')
+            _require({'label', 'url'} <= set(section['source']), f'{path}: source needs label and url')
+        return entry
+
+    def _render_section(self, class_name, language):
+        for section in self.entry(class_name)['sections']:
+            if section['language'] == language:
+                break
+        else:
+            raise CatalogError(f'{class_name} has no {language!r} section')
+        source = section['source']
+        paragraphs = '\n\n'.join(html.escape(paragraph, quote=False) for paragraph in section['paragraphs'])
+        card = (f'<div style="{self.card_style}">\n{paragraphs}\n<br><br>\n'
+                f'<a href="{html.escape(source["url"])}" style="{self.link_style}" target="_blank">'
+                f'{html.escape(source["label"], quote=False)}</a>\n</div>')
+        return f'#### {section["heading"]}', card
+
+    def _render(self, class_name):
+        entry = self.entry(class_name)
+        sections = [self.section(class_name, language) for language in self.languages(class_name)]
+        return RenderedTemple(entry['sidebar'], f'## {entry["title"]}', sections)
+
+
+# Loaded once per process; Streamlit reruns reuse the imported module
+catalog = TempleCatalog()
+
+
+if __name__ == '__main__':
+    try:
+        count = catalog.validate_all()
+    except (CatalogError, OSError, ValueError) as exc:
+        sys.exit(f'Invalid catalog: {exc}')
+    print(f'{count} temples OK')
@@ -0,0 +1,22 @@
+import os
+
+import numpy as np
+
+# Shared by the Streamlit app and the headless tools, so nothing here may import Streamlit
+# TEMPLE_MODEL_PATH can point at an exported .tflite/.onnx model to serve it through the lighter runtime
+MODEL_PATH = os.environ.get('TEMPLE_MODEL_PATH', 'VGG16_model_75.h5')
+
+# Output order of the model's softmax layer
+class_names = ['Angkor_Wat', 'Bayon', 'Koh_Ker', 'Prasat Sambor Prei Kuk', 'Preah_Vihear']
+
+
+# Define the function to get the class label from prediction
+def prediction_cls(prediction, class_names=class_names):
+    return class_names[np.argmax(prediction)]
+
+
+# The k most likely (class name, probability) pairs, best first
+def top_k(prediction, k=3, class_names=class_names):
+    prediction = np.asarray(prediction).reshape(-1)
+    order = np.argsort(prediction)[::-1][:k]
+    return [(class_names[i], float(prediction[i])) for i in order]
@@ -0,0 +1,373 @@
+"""On-disk index of penultimate-layer VGG16 embeddings for near-duplicate detection and similar-photo retrieval.
+
+    python embedding_index.py build reference_photos/ --index embeddings/
+    python embedding_index.py query upload.jpg --index embeddings/ -k 5
+
+Layout of the index directory:
+    manifest.json      model version, dimensions, vector count, projection seed
+    vectors.f16        L2-normalized float16 embeddings, memory-mapped (count x dim)
+    probabilities.f16  the model's softmax output for each vector (count x classes)
+    items.jsonl        one {"path", "label"} line per vector
+    ivf.npz            coarse k-means quantizer (centroids + list assignment) used once the index is large
+
+Embeddings are randomly projected down to --dim dimensions (Johnson-Lindenstrauss) and searched with an inverted
+file over k-means cells, which keeps queries well under a millisecond at 100k+ vectors on CPU. Building is batched
+and incremental (images already in the index are skipped). The index records the digest of the model file that
+produced it and refuses to mix in vectors from any other model version.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+
+from classifier import MODEL_PATH, class_names
+
+logger = logging.getLogger(__name__)
+
+# Below this many vectors an exact scan is as fast as the inverted file
+IVF_MIN_VECTORS = 4096
+
+
+class IndexVersionMismatch(Exception):
+    pass
+
+
+class Match:
+    def __init__(self, id, score, path, label, probabilities):
+        self.id = id
+        self.score = score
+        self.path = path
+        self.label = label
+        self.probabilities = probabilities
+
+
+# Embeddings come from a layer inside the network, which only the Keras backend exposes (not TFLite or ONNX)
+def supports_embeddings(model):
+    return hasattr(getattr(model, 'model', model), 'layers')  # unwrap backends.KerasBackend
+
+
+# Keras model returning (penultimate features, softmax) from a single forward pass
+def penultimate_model(model):
+    import tensorflow as tf
+    if not supports_embeddings(model):
+        raise TypeError('embeddings need the Keras model (TEMPLE_BACKEND=keras)')
+    keras_model = getattr(model, 'model', model)
+    return tf.keras.Model(keras_model.inputs, [keras_model.layers[-2].output, keras_model.output])
+
+
+# Spherical k-means: centroids on the unit sphere, assignment by dot product
+def kmeans(vectors, clusters, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1)
+        # Empty clusters keep their previous centroid
+        centroids[norms > 0] = sums[norms > 0] / norms[norms > 0, np.newaxis]
+    return centroids
+
+
+class EmbeddingIndex:
+    def __init__(self, directory, model_version, dim=256, nprobe=8, create=True):
+        self.directory = directory
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        manifest_path = os.path.join(directory, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            if self.manifest['model_version'] != model_version:
+                raise IndexVersionMismatch(f'{directory} was built with model {self.manifest["model_version"]}, '
+                                           f'current model is {model_version}; rebuild it')
+        elif create:
+            os.makedirs(directory, exist_ok=True)
+            self.manifest = {'model_version': model_version, 'dim': dim, 'source_dim': None, 'count': 0,
+                             'classes': len(class_names), 'projection_seed': 0, 'ivf_trained_on': 0}
+            self._save_manifest()
+        else:
+            raise FileNotFoundError(f'no embedding index in {directory}')
+        self.paths, self.labels = [], []
+        items_path = os.path.join(directory, 'items.jsonl')
+        if os.path.exists(items_path):
+            with open(items_path, encoding='utf-8') as f:
+                for line in f:
+                    item = json.loads(line)
+                    self.paths.append(item['path'])
+                    self.labels.append(class_names.index(item['label']) if item['label'] in class_names else -1)
+        if len(self.paths) > self.count:
+            # Drop item lines written by an add that was interrupted before the manifest was updated
+            self.paths = self.paths[:self.count]
+            with open(items_path, 'w', encoding='utf-8') as f:
+                for path, label in zip(self.paths, self.labels):
+                    f.write(json.dumps({'path': path, 'label': class_names[label] if label >= 0 else None},
+                                       ensure_ascii=False) + '\n')
+        self.labels = np.array(self.labels[:self.count], dtype=np.int16)
+        self.known_paths = set(self.paths)
+        self._projection = None
+        self._open_arrays()
+        self._load_ivf()
+
+    @property
+    def count(self):
+        return self.manifest['count']
+
+    @property
+    def dim(self):
+        return self.manifest['dim']
+
+    def _file(self, name):
+        return os.path.join(self.directory, name)
+
+    def _save_manifest(self):
+        with open(self._file('manifest.json.tmp'), 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(self._file('manifest.json.tmp'), self._file('manifest.json'))
+
+    # Memory-map only the first `count` rows; rows past it belong to an interrupted add and are ignored
+    def _open_arrays(self):
+        if self.count:
+            self.vectors = np.memmap(self._file('vectors.f16'), dtype=np.float16, mode='r',
+                                     shape=(self.count, self.dim))
+            self.probabilities = np.memmap(self._file('probabilities.f16'), dtype=np.float16, mode='r',
+                                           shape=(self.count, self.manifest['classes']))
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float16)
+            self.probabilities = np.zeros((0, self.manifest['classes']), dtype=np.float16)
+
+    def _load_ivf(self):
+        self.centroids = self.order = self.offsets = None
+        if self.manifest['ivf_trained_on'] and os.path.exists(self._file('ivf.npz')):
+            ivf = np.load(self._file('ivf.npz'))
+            centroids, assignment = ivf['centroids'], ivf['assignment'][:self.count]
+            # Vectors added since training are assigned to their nearest cell on open
+            if len(assignment) < self.count:
+                extra = np.asarray(self.vectors[len(assignment):], dtype=np.float32)
+                assignment = np.concatenate([assignment, np.argmax(extra @ centroids.T, axis=1)])
+            self._set_ivf(centroids, assignment)
+
+    def _set_ivf(self, centroids, assignment):
+        self.centroids, self.assignment = centroids, assignment
+        self.order = np.argsort(assignment, kind='stable').astype(np.int64)
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(len(centroids) + 1))
+
+    # Random Gaussian projection from the layer width down to `dim`, reproducible from the manifest seed
+    def projection(self, source_dim):
+        if self._projection is None:
+            if self.manifest['source_dim'] is None:
+                self.manifest['source_dim'] = source_dim
+                self.manifest['dim'] = min(self.manifest['dim'], source_dim)
+            if source_dim != self.manifest['source_dim']:
+                raise IndexVersionMismatch(f'embedding width {source_dim} != {self.manifest["source_dim"]}')
+            if self.dim == source_dim:
+                self._projection = np.eye(source_dim, dtype=np.float32)
+            else:
+                rng = np.random.default_rng(self.manifest['projection_seed'])
+                self._projection = (rng.standard_normal((source_dim, self.dim)) / np.sqrt(self.dim)).astype(np.float32)
+        return self._projection
+
+    def embed(self, features):
+        features = np.asarray(features, dtype=np.float32).reshape(len(features), -1)
+        vectors = features @ self.projection(features.shape[1])
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    # Predict function for inference_scheduler.get_scheduler: each row is [probabilities | embedding]
+    def predict_rows(self, model):
+        extractor = penultimate_model(model)
+
+        def predict(batch):
+            features, probabilities = extractor.predict(batch, batch_size=len(batch), verbose=0)
+            return np.hstack([probabilities, self.embed(features)])
+        return predict
+
+    def add(self, paths, vectors, probabilities, labels):
+        vectors = np.asarray(vectors, dtype=np.float16).reshape(len(paths), self.dim)
+        probabilities = np.asarray(probabilities, dtype=np.float16).reshape(len(paths), self.manifest['classes'])
+        with self._lock:
+            # Data files first, manifest count last: a crash in between leaves rows the next open ignores
+            for name, array in (('vectors.f16', vectors), ('probabilities.f16', probabilities)):
+                with open(self._file(name), 'r+b' if os.path.exists(self._file(name)) else 'wb') as f:
+                    f.seek(self.count * array.shape[1] * 2)
+                    f.write(array.tobytes())
+                    f.truncate()
+            with open(self._file('items.jsonl'), 'a', encoding='utf-8') as f:
+                for path, label in zip(paths, labels):
+                    f.write(json.dumps({'path': path, 'label': label}, ensure_ascii=False) + '\n')
+            self.paths.extend(paths)
+            self.known_paths.update(paths)
+            self.labels = np.concatenate([self.labels, [class_names.index(l) if l in class_names else -1
+                                                        for l in labels]]).astype(np.int16)
+            self.manifest['count'] += len(paths)
+            self._save_manifest()
+            self._open_arrays()
+            if self.centroids is not None:
+                assignment = np.argmax(vectors.astype(np.float32) @ self.centroids.T, axis=1)
+                self._set_ivf(self.centroids, np.concatenate([self.assignment, assignment]))
+
+    # (Re)build the inverted file once the index is big enough, or has grown 4x since it was last trained
+    def train(self, force=False):
+        trained_on = self.manifest['ivf_trained_on']
+        if self.count < IVF_MIN_VECTORS or not (force or trained_on == 0 or self.count >= 4 * trained_on):
+            return False
+        with self._lock:
+            clusters = int(4 * np.sqrt(self.count))
+            rng = np.random.default_rng(0)
+            sample = np.asarray(self.vectors[np.sort(rng.choice(self.count, min(self.count, 32 * clusters),
+                                                                replace=False))], dtype=np.float32)
+            centroids = kmeans(sample, clusters).astype(np.float32)
+            assignment = np.concatenate([np.argmax(np.asarray(self.vectors[i:i + 65536], dtype=np.float32)
+                                                   @ centroids.T, axis=1) for i in range(0, self.count, 65536)])
+            np.savez(self._file('ivf.npz'), centroids=centroids, assignment=assignment.astype(np.int32))
+            self._set_ivf(centroids, assignment)
+            self.manifest['ivf_trained_on'] = self.count
+            self._save_manifest()
+        return True
+
+    def _candidates(self, query, label, k):
+        if self.centroids is None:
+            ids = np.arange(self.count)
+            return ids[self.labels == label] if label is not None else ids
+        cell_scores = self.centroids @ query
+        nprobe = self.nprobe
+        while True:
+            cells = np.argpartition(-cell_scores, min(nprobe, len(cell_scores)) - 1)[:nprobe]
+            ids = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+            if label is not None:
+                ids = ids[self.labels[ids] == label]
+            # Widen the probe when a class filter leaves too few candidates
+            if len(ids) >= k or nprobe >= len(cell_scores):
+                return np.sort(ids)
+            nprobe *= 2
+
+    # k most similar indexed images (cosine similarity), optionally restricted to one class
+    def search(self, vector, k=5, label=None):
+        if not self.count:
+            return []
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        label_index = class_names.index(label) if label is not None else None
+        ids = self._candidates(query, label_index, k)
+        if not len(ids):
+            return []
+        scores = np.asarray(self.vectors[ids], dtype=np.float32) @ query
+        best = np.argsort(-scores)[:k]
+        return [Match(int(ids[i]), float(scores[i]), self.paths[ids[i]],
+                      class_names[self.labels[ids[i]]] if self.labels[ids[i]] >= 0 else None,
+                      np.asarray(self.probabilities[ids[i]], dtype=np.float32)) for i in best]
+
+    # The indexed image this embedding is a near-copy of, if any
+    def near_duplicate(self, vector, threshold=0.97):
+        matches = self.search(vector, k=1)
+        return matches[0] if matches and matches[0].score >= threshold else None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Shared read-only index for the running model version, or None when it is missing, built by another model, or
+# `model` is a backend that can't produce embeddings
+def get_index(directory, model_version, model=None):
+    with _indexes_lock:
+        key = (directory, model_version)
+        if key not in _indexes:
+            try:
+                if model is not None and not supports_embeddings(model):
+                    raise TypeError(f'{type(model).__name__} has no layers to take embeddings from '
+                                    f'(TEMPLE_BACKEND=keras is needed)')
+                _indexes[key] = EmbeddingIndex(directory, model_version, create=False)
+            except (FileNotFoundError, IndexVersionMismatch, TypeError) as exc:
+                logger.warning('embedding index disabled: %s', exc)
+                _indexes[key] = None
+        return _indexes[key]
+
+
+def build(args):
+    from batch_classify import decode_stream, iter_images
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(max_models=1)
+    entry = registry.entry(args.model)
+    if args.rebuild and os.path.isdir(args.index):
+        shutil.rmtree(args.index)
+    index = EmbeddingIndex(args.index, entry.digest, dim=args.dim)
+    predict = index.predict_rows(entry.model)
+    paths = (path for path in iter_images(args.inputs) if path not in index.known_paths)
+    batch_paths, batch = [], []
+    added = 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal added
+        if not batch_paths:
+            return
+        rows = predict(np.concatenate(batch))
+        probabilities, vectors = rows[:, :len(class_names)], rows[:, len(class_names):]
+        # Reference photos are labelled by their folder name when it is a class, else by the model
+        labels = [os.path.basename(os.path.dirname(path)) for path in batch_paths]
+        labels = [label if label in class_names else class_names[int(np.argmax(p))]
+                  for label, p in zip(labels, probabilities)]
+        index.add(list(batch_paths), vectors, probabilities, labels)
+        added += len(batch_paths)
+        batch_paths.clear()
+        batch.clear()
+
+    for path, image, error in decode_stream(paths, args.workers, window=4 * args.batch_size):
+        if error is not None:
+            print(f'skipping {path}: {error}', file=sys.stderr)
+            continue
+        batch_paths.append(path)
+        batch.append(image)
+        if len(batch_paths) == args.batch_size:
+            flush()
+    flush()
+    trained = index.train()
+    elapsed = time.perf_counter() - start
+    print(f'Added {added} images ({index.count} total) in {elapsed:.1f}s'
+          f'{", rebuilt the inverted file" if trained else ""}', file=sys.stderr)
+
+
+def query(args):
+    from model_registry import ModelRegistry
+    from preprocessing import preprocess_image
+
+    entry = ModelRegistry(max_models=1).entry(args.model)
+    index = EmbeddingIndex(args.index, entry.digest, create=False)
+    row = index.predict_rows(entry.model)(preprocess_image(args.image))[0]
+    vector = row[len(class_names):]
+    start = time.perf_counter()
+    matches = index.search(vector, k=args.k, label=args.label)
+    elapsed = time.perf_counter() - start
+    for match in matches:
+        print(f'{match.score:.4f}  {match.label}  {match.path}')
+    print(f'{len(matches)} matches from {index.count} vectors in {elapsed * 1000:.3f} ms', file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and query the temple embedding index.')
+    parser.add_argument('--model', default=MODEL_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='add images to the index (incremental)')
+    build_parser.add_argument('inputs', nargs='+', help='directories (searched recursively) or glob patterns')
+    build_parser.add_argument('--index', required=True)
+    build_parser.add_argument('--dim', type=int, default=256, help='projected embedding size (new index only)')
+    build_parser.add_argument('--batch-size', type=int, default=32)
+    build_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    build_parser.add_argument('--rebuild', action='store_true', help='drop the existing index first')
+    query_parser = commands.add_parser('query', help='find the indexed images most similar to one image')
+    query_parser.add_argument('image')
+    query_parser.add_argument('--index', required=True)
+    query_parser.add_argument('-k', type=int, default=5)
+    query_parser.add_argument('--label', choices=class_names, help='only return images of this class')
+    args = parser.parse_args(argv)
+    build(args) if args.command == 'build' else query(args)
+
+
+if __name__ == '__main__':
+    main()
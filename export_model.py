@@ -0,0 +1,144 @@
+"""Export VGG16_model_75.h5 to TFLite or ONNX for faster CPU serving, then check it against the Keras model.
+
+    python export_model.py --format tflite --quantize int8 --calibration-dir samples/ -o VGG16_model_75.int8.tflite
+    python export_model.py --format onnx --quantize dynamic -o VGG16_model_75.onnx
+
+Serve the result with TEMPLE_MODEL_PATH=VGG16_model_75.int8.tflite (the backend is picked from the suffix,
+or forced with TEMPLE_BACKEND=keras|tflite|onnx).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from backends import load_backend
+from batch_classify import iter_images
+from classifier import MODEL_PATH, class_names
+from preprocessing import IMAGE_SIZE, preprocess_image
+
+QUANTIZATIONS = ('none', 'dynamic', 'float16', 'int8')
+
+
+# Preprocessed images from a folder, exactly as the app feeds them to the model
+def load_samples(directory, limit):
+    paths = []
+    for path in iter_images([directory]):
+        paths.append(path)
+        if len(paths) == limit:
+            break
+    if not paths:
+        sys.exit(f'No .jpg/.png images found in {directory}')
+    return np.concatenate([preprocess_image(path) for path in paths])
+
+
+def export_tflite(model, output, quantize, samples):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'int8':
+        # Full integer weights and activations; the input and output stay float32 so preprocessing is unchanged
+        converter.representative_dataset = lambda: ([sample[np.newaxis]] for sample in samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output, 'wb') as f:
+        f.write(converter.convert())
+
+
+class CalibrationReader:
+    # onnxruntime.quantization pulls calibration batches through this reader interface
+    def __init__(self, input_name, samples):
+        self.batches = iter([{input_name: sample[np.newaxis]} for sample in samples])
+
+    def get_next(self):
+        return next(self.batches, None)
+
+
+def export_onnx(model, output, quantize, samples):
+    import tensorflow as tf
+    import tf2onnx
+    signature = [tf.TensorSpec((None,) + IMAGE_SIZE + (3,), tf.float32, name='input')]
+    if quantize == 'none':
+        tf2onnx.convert.from_keras(model, input_signature=signature, output_path=output)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        float_model = os.path.join(tmp, 'float.onnx')
+        tf2onnx.convert.from_keras(model, input_signature=signature, output_path=float_model)
+        if quantize == 'float16':
+            import onnx
+            from onnxconverter_common import float16
+            onnx.save(float16.convert_float_to_float16(onnx.load(float_model), keep_io_types=True), output)
+        elif quantize == 'dynamic':
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(float_model, output, weight_type=QuantType.QInt8)
+        else:
+            from onnxruntime.quantization import QuantType, quantize_static
+            quantize_static(float_model, output, CalibrationReader('input', samples),
+                            activation_type=QuantType.QInt8, weight_type=QuantType.QInt8)
+
+
+# Compare the exported model with the Keras one: top-1 agreement overall and per Keras-predicted class,
+# plus how far the probabilities drift
+def parity_report(reference, candidate, samples, batch_size=32):
+    expected = np.concatenate([reference.predict(samples[i:i + batch_size], verbose=0)
+                               for i in range(0, len(samples), batch_size)])
+    actual = np.concatenate([candidate.predict(samples[i:i + batch_size])
+                             for i in range(0, len(samples), batch_size)])
+    expected_top1, actual_top1 = expected.argmax(axis=1), actual.argmax(axis=1)
+    drift = np.abs(expected - actual)
+    per_class = {}
+    for index, name in enumerate(class_names):
+        mask = expected_top1 == index
+        if mask.any():
+            per_class[name] = {'images': int(mask.sum()),
+                               'top1_agreement': float((actual_top1[mask] == index).mean())}
+    return {
+        'images': len(samples),
+        'top1_agreement': float((expected_top1 == actual_top1).mean()),
+        'mean_abs_drift': float(drift.mean()),
+        'max_abs_drift': float(drift.max()),
+        'per_class': per_class,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the Keras model to TFLite/ONNX with optional quantization.')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('-o', '--output', help='output file (default: model name with the format suffix)')
+    parser.add_argument('--format', choices=('tflite', 'onnx'), default='tflite')
+    parser.add_argument('--quantize', choices=QUANTIZATIONS, default='none')
+    parser.add_argument('--calibration-dir', help='representative temple images (required for int8)')
+    parser.add_argument('--calibration-samples', type=int, default=100)
+    parser.add_argument('--parity-dir', help='images for the accuracy-parity check (default: the calibration set)')
+    parser.add_argument('--parity-samples', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.quantize == 'int8' and not args.calibration_dir:
+        parser.error('--quantize int8 needs --calibration-dir')
+    output = args.output or f'{os.path.splitext(args.model)[0]}.{args.quantize}.{args.format}'
+
+    import tensorflow as tf
+    model = tf.keras.models.load_model(args.model)
+    samples = load_samples(args.calibration_dir, args.calibration_samples) if args.calibration_dir else None
+    export = export_tflite if args.format == 'tflite' else export_onnx
+    export(model, output, args.quantize, samples)
+    print(f'Wrote {output} ({os.path.getsize(output) / 2**20:.1f} MB, '
+          f'Keras model {os.path.getsize(args.model) / 2**20:.1f} MB)', file=sys.stderr)
+
+    parity_dir = args.parity_dir or args.calibration_dir
+    if parity_dir is None:
+        print('No --parity-dir or --calibration-dir given, skipping the accuracy-parity check', file=sys.stderr)
+        return
+    report = parity_report(model, load_backend(output, args.format), load_samples(parity_dir, args.parity_samples))
+    report.update(model=args.model, output=output, format=args.format, quantize=args.quantize)
+    with open(output + '.parity.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
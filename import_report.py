@@ -0,0 +1,82 @@
+"""Report what each heavy import costs at start-up.
+
+Every module is imported in a fresh interpreter with `python -X importtime`, so the numbers are cold-import
+costs that don't depend on the order modules happen to be imported in.
+
+    python import_report.py
+    python import_report.py tensorflow streamlit --json
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules the app, the API server and the backends may pull in at start-up
+DEFAULT_MODULES = ('numpy', 'PIL.Image', 'requests', 'streamlit', 'tensorflow', 'fastapi', 'uvicorn',
+                   'onnxruntime', 'tflite_runtime.interpreter', 'app_modules')
+
+# Our own modules imported by app.py, to check they stay cheap (TensorFlow must not be among their imports)
+APP_MODULES = ('model_registry', 'inference_scheduler', 'preprocessing', 'classifier', 'prediction_cache',
+               'api_client', 'metrics', 'catalog', 'embedding_index', 'tta')
+
+
+def importtime(statement):
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], capture_output=True, text=True)
+
+
+# Modules the interpreter imports before running any code (site, encodings, ...), excluded from the report
+def startup_modules():
+    return {line.split('|')[-1].strip() for line in importtime('pass').stderr.splitlines()
+            if line.startswith('import time:')}
+
+
+# Import one module in a clean interpreter and parse the -X importtime lines from stderr
+def measure(module, top=5, skip=frozenset()):
+    statement = '; '.join(f'import {name}' for name in (APP_MODULES if module == 'app_modules' else [module]))
+    result = importtime(statement)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if name.strip() not in skip:
+            rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    if result.returncode != 0:
+        return {'module': module, 'error': result.stderr.strip().splitlines()[-1] if result.stderr else 'failed'}
+    # Nesting is shown by indentation; top-level imports are indented by a single space
+    top_level = [(name, cumulative) for name, _, cumulative in rows if not name.startswith('  ')]
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return {
+        'module': module,
+        'seconds': sum(cumulative for _, cumulative in top_level) / 1e6,
+        'modules_loaded': len(rows),
+        'imports_tensorflow': any(name.strip() == 'tensorflow' for name, _, _ in rows),
+        'slowest': [{'module': name.strip(), 'self_seconds': self_us / 1e6} for name, self_us, _ in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the cold import time of heavy modules.')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES,
+                        help='modules to measure ("app_modules" = everything app.py imports from this repo)')
+    parser.add_argument('--top', type=int, default=5, help='slowest nested imports to list per module')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    skip = startup_modules()
+    report = [measure(module, args.top, skip) for module in args.modules]
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for entry in sorted(report, key=lambda entry: entry.get('seconds', -1), reverse=True):
+        if 'error' in entry:
+            print(f"{entry['module']:28s}   not importable ({entry['error']})")
+            continue
+        flag = '  (imports tensorflow)' if entry['imports_tensorflow'] and entry['module'] != 'tensorflow' else ''
+        print(f"{entry['module']:28s} {entry['seconds']:7.3f}s  {entry['modules_loaded']:5d} modules{flag}")
+        for nested in entry['slowest']:
+            print(f"    {nested['module']:40s} {nested['self_seconds']:7.3f}s self")
+
+
+if __name__ == '__main__':
+    main()
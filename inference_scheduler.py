@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+
+
+class SchedulerFull(Exception):
+    # Raised when the request queue is at its configured depth and the caller chose not to wait
+    pass
+
+
+class SchedulerStopped(RuntimeError):
+    # Raised by submit() on a scheduler that was stopped, e.g. replaced by get_scheduler after a model reload
+    pass
+
+
+class BatchScheduler:
+    # Collects single-image requests from concurrent sessions and runs them through the model in micro-batches.
+    # A batch is flushed as soon as it holds max_batch_size images or the oldest request has waited max_wait_ms.
+    def __init__(self, predict, max_batch_size=16, max_wait_ms=10, max_queue_size=256):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stopped = threading.Event()
+        # Held while checking _stopped and enqueueing, so nothing can be queued after the worker drains and exits
+        self._submit_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+        self._worker.start()
+
+    # Queue one preprocessed image of shape (1, H, W, C) or (H, W, C); the future resolves to its softmax row.
+    # A full queue blocks the caller (backpressure); with block=False, or once timeout expires, SchedulerFull is raised.
+    def submit(self, image, block=True, timeout=None):
+        image = np.asarray(image, dtype=np.float32)
+        if image.ndim == 4:
+            if image.shape[0] != 1:
+                raise ValueError(f'expected a single image, got a batch of {image.shape[0]}')
+            image = image[0]
+        future = Future()
+        with self._submit_lock:
+            if self._stopped.is_set():
+                raise SchedulerStopped('scheduler is stopped')
+            try:
+                self._queue.put((image, future), block=block, timeout=timeout)
+            except queue.Full:
+                raise SchedulerFull(f'inference queue is full ({self._queue.maxsize} pending requests)') from None
+        return future
+
+    # Convenience wrapper returning the probabilities directly
+    def predict_one(self, image, timeout=None):
+        return self.submit(image).result(timeout=timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    # Requests already queued are still answered before the worker exits
+    def stop(self):
+        with self._submit_lock:
+            self._stopped.set()
+        self._worker.join()
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if not batch:
+                continue
+            # Skip requests whose caller already gave up
+            batch = [(image, future) for image, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            metrics.batch_size.observe(len(batch))
+            try:
+                # Sampled here, on the worker thread, because a profile of the request thread never sees model.predict
+                with metrics.profiler.sample('inference'), metrics.timed('inference'):
+                    probabilities = np.asarray(self.predict(np.stack([image for image, _ in batch])))
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for row, (_, future) in zip(probabilities, batch):
+                future.set_result(row)
+
+
+# Run the Keras model on a batch without the per-call progress bar
+def keras_predict(model):
+    return lambda batch: model.predict(batch, batch_size=len(batch), verbose=0)
+
+
+# Scheduler settings, overridable from the environment
+SCHEDULER_OPTIONS = {
+    'max_batch_size': int(os.environ.get('TEMPLE_MAX_BATCH_SIZE', 16)),
+    'max_wait_ms': float(os.environ.get('TEMPLE_MAX_WAIT_MS', 10)),
+    'max_queue_size': int(os.environ.get('TEMPLE_MAX_QUEUE_SIZE', 256)),
+}
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+# One scheduler per model key, shared by every session in the process.
+# When the registry hands out a reloaded model the old scheduler is drained and replaced.
+# `predict` turns the model into the batch function, e.g. one that also returns embeddings.
+def get_scheduler(model, key='default', predict=keras_predict, **options):
+    with _schedulers_lock:
+        current = _schedulers.get(key)
+        if current is not None and current[0] is model:
+            return current[1]
+        if current is not None:
+            current[1].stop()
+        scheduler = BatchScheduler(predict(model), **{**SCHEDULER_OPTIONS, **options})
+        _schedulers[key] = (model, scheduler)
+        return scheduler
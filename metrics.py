@@ -0,0 +1,280 @@
+"""In-process metrics for the classifier hot path, exposed in Prometheus text format.
+
+Set TEMPLE_METRICS_PORT to serve /metrics, /metrics.json and /profiling from a background thread,
+and TEMPLE_JSON_LOGS=1 to also log every timed stage as a JSON line.
+
+The sampling profiler is off by default and can be switched on while the app runs:
+
+    curl 'localhost:9108/profiling?every=50&mode=cprofile'     # profile 1 in 50 requests
+    curl 'localhost:9108/profiling?every=0'                    # off again
+"""
+import bisect
+import collections
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger('temple.metrics')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONFIDENCE_BUCKETS = (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+MEGAPIXEL_BUCKETS = (0.1, 0.5, 1, 2, 4, 8, 12, 16, 24, 48)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            lines += [f'{self.name}{_label_text(key)} {value}' for key, value in sorted(self.values.items())]
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return {_label_text(key) or 'total': value for key, value in self.values.items()}
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_label_text(key + (("le", bound),))} {cumulative}')
+                lines.append(f'{self.name}_sum{_label_text(key)} {series[-1]}')
+                lines.append(f'{self.name}_count{_label_text(key)} {cumulative}')
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return {_label_text(key) or 'total': {'count': sum(series[:-1]), 'sum': series[-1]}
+                    for key, series in self.series.items()}
+
+
+stage_seconds = Histogram('temple_stage_seconds', 'Time spent per hot-path stage.', LATENCY_BUCKETS)
+predictions_total = Counter('temple_predictions_total', 'Predictions per predicted class.')
+confidence = Histogram('temple_prediction_confidence', 'Probability of the predicted class.', CONFIDENCE_BUCKETS)
+input_megapixels = Histogram('temple_input_megapixels', 'Size of uploaded images before decoding.', MEGAPIXEL_BUCKETS)
+batch_size = Histogram('temple_inference_batch_size', 'Images per model.predict call.', BATCH_BUCKETS)
+errors_total = Counter('temple_errors_total', 'Errors per stage.')
+
+METRICS = (stage_seconds, predictions_total, confidence, input_megapixels, batch_size, errors_total)
+
+json_logs = os.environ.get('TEMPLE_JSON_LOGS', '') not in ('', '0')
+if json_logs and not logger.handlers:
+    # One bare JSON object per line on stderr, independent of how (or whether) the root logger is configured
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def log_event(event, **fields):
+    if json_logs:
+        logger.info(json.dumps(dict(fields, event=event, ts=time.time()), default=str))
+
+
+def observe_stage(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+    log_event('stage', stage=stage, seconds=seconds)
+
+
+# Time a stage; exceptions are counted against the stage and re-raised
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        errors_total.inc(stage=stage)
+        log_event('error', stage=stage, error=f'{type(exc).__name__}: {exc}')
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def record_input_size(size):
+    input_megapixels.observe(size[0] * size[1] / 1e6)
+
+
+def record_prediction(predicted_class, probability):
+    predictions_total.inc(**{'class': predicted_class})
+    confidence.observe(probability)
+    log_event('prediction', predicted_class=predicted_class, confidence=probability)
+
+
+def render_prometheus():
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+
+def snapshot():
+    return {metric.name: metric.snapshot() for metric in METRICS}
+
+
+class SamplingProfiler:
+    # Profiles 1 in `every` calls of each sampled section (e.g. uploads, inference batches) with cProfile or
+    # tracemalloc and writes the result to `directory`. cProfile only sees the thread that enabled it, so sections
+    # running on other threads (the inference-scheduler worker) sample themselves under their own name.
+    # every=0 disables it; configure() can be called at any time, e.g. from the /profiling endpoint.
+    def __init__(self, every=0, mode='cprofile', directory='profiles'):
+        self.every, self.mode, self.directory = every, mode, directory
+        self.requests = collections.Counter()
+        self._lock = threading.Lock()
+        self._active = {}  # name -> mode of the profiles in progress
+
+    def configure(self, every=None, mode=None, directory=None):
+        if mode is not None and mode not in ('cprofile', 'tracemalloc'):
+            raise ValueError(f'unknown profiler mode {mode!r}')
+        with self._lock:
+            if every is not None:
+                self.every = int(every)
+            if mode is not None:
+                self.mode = mode
+            if directory is not None:
+                self.directory = directory
+            return self.config()
+
+    def config(self):
+        return {'every': self.every, 'mode': self.mode, 'directory': self.directory, 'requests': dict(self.requests)}
+
+    def _should_sample(self, name):
+        with self._lock:
+            self.requests[name] += 1
+            if self.every <= 0 or self.requests[name] % self.every or name in self._active:
+                return None
+            # tracemalloc is process-wide, so it never overlaps with another profile
+            if self._active and 'tracemalloc' in (self.mode, *self._active.values()):
+                return None
+            self._active[name] = self.mode
+            return self.mode
+
+    @contextmanager
+    def sample(self, name='request'):
+        mode = self._should_sample(name)
+        if mode is None:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}-{self.requests[name]}')
+        try:
+            if mode == 'cprofile':
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Python 3.12+ allows only one active cProfile per process; skip this sample
+                    yield
+                    return
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                    profile.dump_stats(path + '.prof')
+            else:
+                started = not tracemalloc.is_tracing()
+                if started:
+                    tracemalloc.start()
+                before = tracemalloc.take_snapshot()
+                try:
+                    yield
+                finally:
+                    stats = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+                    if started:
+                        tracemalloc.stop()
+                    with open(path + '.tracemalloc.txt', 'w') as f:
+                        f.write('\n'.join(str(stat) for stat in stats[:50]) + '\n')
+        finally:
+            with self._lock:
+                del self._active[name]
+
+
+profiler = SamplingProfiler(every=int(os.environ.get('TEMPLE_PROFILE_EVERY', 0)),
+                            mode=os.environ.get('TEMPLE_PROFILE_MODE', 'cprofile'),
+                            directory=os.environ.get('TEMPLE_PROFILE_DIR', 'profiles'))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/metrics':
+            self._send(200, render_prometheus(), 'text/plain; version=0.0.4')
+        elif url.path == '/metrics.json':
+            self._send(200, json.dumps(snapshot()), 'application/json')
+        elif url.path == '/profiling':
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                config = profiler.configure(every=query.get('every'), mode=query.get('mode'))
+            except ValueError as exc:
+                self._send(400, json.dumps({'error': str(exc)}), 'application/json')
+                return
+            self._send(200, json.dumps(config), 'application/json')
+        else:
+            self._send(404, 'not found\n', 'text/plain')
+
+    def _send(self, status, body, content_type):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would otherwise flood stderr
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+# Start the metrics endpoint once per process (safe to call on every Streamlit rerun)
+def start_metrics_server(port, host='127.0.0.1'):
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        return _server
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+from backends import load_backend
+
+# Shape of the dummy batch used to warm up a freshly loaded model (matches the 150x150 RGB input of VGG16_model_75.h5)
+WARMUP_SHAPE = (1, 150, 150, 3)
+
+
+# Resident set size of the current process in bytes (Linux /proc first, getrusage peak as a fallback)
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Hash the model file in chunks so multi-hundred MB .h5 files don't have to fit in memory twice
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Size of the model weights in bytes, when the loaded object exposes Keras-style weights
+def weights_bytes(model):
+    total = 0
+    for weight in getattr(model, 'weights', None) or []:
+        dtype = getattr(weight.dtype, 'as_numpy_dtype', weight.dtype)
+        total += int(np.prod(weight.shape)) * np.dtype(dtype).itemsize
+    return total
+
+
+class ModelEntry:
+    # One loaded model plus the bookkeeping used for reload detection and reporting
+    def __init__(self, path, model, stat, digest, load_seconds, rss_delta, warmup_seconds):
+        self.path = path
+        self.model = model
+        self.stat = stat
+        self.digest = digest
+        self.load_seconds = load_seconds
+        self.rss_delta = rss_delta
+        self.warmup_seconds = warmup_seconds
+        self.weights_bytes = weights_bytes(model)
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'version': self.digest,
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'rss_delta_bytes': self.rss_delta,
+            'weights_bytes': self.weights_bytes,
+            'loaded_at': self.loaded_at,
+            'last_used': self.last_used,
+        }
+
+
+class ModelRegistry:
+    # Process-wide cache of loaded models: each file is loaded once and shared read-only by every session and thread.
+    # Models are reloaded when the file on disk changes and evicted least-recently-used beyond max_models.
+    def __init__(self, max_models=2, loader=load_backend, warmup=True):
+        self.max_models = max_models
+        self.loader = loader
+        self.warmup = warmup
+        self._entries = OrderedDict()
+        self._preloads = {}
+        # _lock only guards the dictionaries and is never held during file I/O or a load, so stats() and lookups of
+        # other models don't wait for a load in progress; loads of the same path are serialized by its own lock
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def get(self, path, loader=None):
+        return self.entry(path, loader).model
+
+    # Start loading in a background thread (once per path) and return a future for the model,
+    # so callers can render immediately and only wait when they actually need a prediction
+    def preload(self, path, loader=None):
+        path = os.path.abspath(path)
+        with self._lock:
+            future = self._preloads.get(path)
+            if future is not None and not (future.done() and future.exception() is not None):
+                return future
+            future = self._preloads[path] = Future()
+        future.set_running_or_notify_cancel()
+
+        def load():
+            try:
+                future.set_result(self.get(path, loader))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=load, name='model-preload', daemon=True).start()
+        return future
+
+    def entry(self, path, loader=None):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and self._same_file(entry, stat):
+                return self._touch(path, entry)
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        with path_lock:
+            # Another thread may have loaded (or re-checked) the file while we waited
+            with self._lock:
+                entry = self._entries.get(path)
+            if entry is not None and not self._changed(entry, stat):
+                with self._lock:
+                    return self._touch(path, entry)
+            entry = self._load(path, stat, loader or self.loader)
+            with self._lock:
+                self._entries[path] = entry
+                self._touch(path, entry)
+                while len(self._entries) > self.max_models:
+                    self._entries.popitem(last=False)
+            return entry
+
+    # Version of the model currently in use, without checking the file again (get() just did)
+    def version(self, path):
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+        return (entry or self.entry(path)).digest
+
+    def evict(self, path):
+        with self._lock:
+            return self._entries.pop(os.path.abspath(path), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return [entry.stats() for entry in self._entries.values()]
+
+    def _touch(self, path, entry):
+        if path in self._entries:  # it may have been evicted since it was looked up
+            self._entries.move_to_end(path)
+        entry.last_used = time.time()
+        return entry
+
+    @staticmethod
+    def _same_file(entry, stat):
+        return (stat.st_mtime_ns, stat.st_size) == (entry.stat.st_mtime_ns, entry.stat.st_size)
+
+    # A cheap stat() comparison runs on every access; the file is only re-hashed when mtime or size moved
+    def _changed(self, entry, stat):
+        if self._same_file(entry, stat):
+            return False
+        if file_digest(entry.path) == entry.digest:
+            entry.stat = stat
+            return False
+        return True
+
+    def _load(self, path, stat, loader):
+        digest = file_digest(path)
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        with metrics.timed('model_load'):
+            model = loader(path)
+        load_seconds = time.perf_counter() - start
+        warmup_seconds = self._warm_up(model) if self.warmup else 0.0
+        return ModelEntry(path, model, stat, digest, load_seconds, rss_bytes() - rss_before, warmup_seconds)
+
+    # Run one dummy batch so graph tracing happens now instead of on the first real upload
+    def _warm_up(self, model):
+        shape = WARMUP_SHAPE
+        input_shape = getattr(model, 'input_shape', None)
+        if isinstance(input_shape, tuple) and len(input_shape) == 4 and None not in input_shape[1:]:
+            shape = (1,) + tuple(input_shape[1:])
+        start = time.perf_counter()
+        model.predict(np.zeros(shape, dtype=np.float32), verbose=0)
+        return time.perf_counter() - start
+
+
+# Shared registry for the whole process (Streamlit keeps imported modules alive across reruns and sessions)
+registry = ModelRegistry()
+
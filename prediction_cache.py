@@ -0,0 +1,185 @@
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+# Fast key over the raw uploaded bytes
+def content_key(data):
+    return 'b:' + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Secondary keys over the preprocessed (1, 150, 150, 3) tensor, so re-encoded or re-saved copies of the same photo
+# (different bytes, slightly different pixels) still map to the same key. A key has two parts:
+#   - a 64-bit difference hash (dHash) of a 9x8 grayscale thumbnail, for the structure of the image;
+#   - the mean of each channel and the mean chroma, at 16 levels each, so a darker, recoloured or grayscale copy
+#     (which the model sees differently) doesn't share the key.
+# Re-encoding can push a nearly-zero dHash difference or a value close to a level boundary to the other side, so
+# besides the canonical key (first, the one to store under) we return the keys with every combination of the
+# `weak_bits` least certain bits flipped and the `weak_levels` values closest to a boundary moved across it, to
+# probe with. Flat or low-contrast images have no reliable structure and get no tensor key at all (an empty list).
+def tensor_keys(array, weak_bits=3, weak_levels=2, levels=16, margin=0.004, noise_floor=0.01):
+    image = np.asarray(array, dtype=np.float32).reshape(array.shape[-3:])
+    gray = image @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    thumbnail = np.asarray(Image.fromarray(gray, mode='F').resize((9, 8), Image.BOX))
+    differences = (thumbnail[:, 1:] - thumbnail[:, :-1]).ravel()
+    if np.abs(differences).max() < noise_floor:
+        return []
+    bits = differences > 0
+    weakest = np.argsort(np.abs(differences))[:weak_bits]
+    hashes = []
+    for count in range(weak_bits + 1):
+        for flipped in itertools.combinations(weakest, count):
+            probe = bits.copy()
+            probe[list(flipped)] ^= True
+            hashes.append(np.packbits(probe).tobytes().hex())
+
+    chroma = np.abs(image[..., [0, 2]] - image[..., 1:2]).mean() * 4  # scaled up, photos are rarely saturated
+    scaled = np.clip(np.append(image.mean(axis=(0, 1)), chroma), 0, 1) * levels
+    quantized = np.minimum(scaled.astype(int), levels - 1)
+    offsets = scaled - quantized  # position inside the level, 0..1
+    alternatives = [[level] for level in quantized]
+    for i in sorted(range(len(scaled)), key=lambda i: min(offsets[i], 1 - offsets[i]))[:weak_levels]:
+        if offsets[i] < margin * levels and quantized[i] > 0:
+            alternatives[i].append(quantized[i] - 1)
+        elif offsets[i] > 1 - margin * levels and quantized[i] < levels - 1:
+            alternatives[i].append(quantized[i] + 1)
+    colours = [''.join(f'{level:x}' for level in combination) for combination in itertools.product(*alternatives)]
+    return [f't:{digest}:{colour}' for colour in colours for digest in hashes]
+
+
+class PredictionCache:
+    # LRU + TTL cache of probability vectors, with an optional sqlite tier that survives restarts.
+    # Entries belong to a model version; binding a different version drops everything computed by the old model.
+    def __init__(self, max_entries=4096, ttl_seconds=24 * 3600, disk_path=None, max_disk_entries=100000):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.model_version = None
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk_path = disk_path
+        self._db = None
+        self._db_pid = None
+        self._inherited = []
+        self._disk_writes = 0
+
+    # The sqlite tier's connection, opened on first use in each process (call with _lock held).
+    # SQLite connections must not be used across fork(), so a forked worker opens its own instead of reusing the
+    # parent's, and never closes the inherited one either.
+    def _connection(self):
+        if not self.disk_path:
+            return None
+        if self._db_pid != os.getpid():
+            if self._db is not None:
+                self._inherited.append(self._db)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS predictions '
+                             '(key TEXT PRIMARY KEY, model_version TEXT, created REAL, probabilities BLOB)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created)')
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    # Make sure cached predictions come from this model version, invalidating them if the model file changed
+    def bind_model(self, version):
+        with self._lock:
+            if version == self.model_version:
+                return
+            if self.model_version is not None:
+                self.counters['invalidations'] += 1
+            self.model_version = version
+            self._entries.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute('DELETE FROM predictions WHERE model_version != ? OR created < ?',
+                           (version, time.time() - self.ttl))
+                db.commit()
+
+    # Return the cached probabilities for the first key that hits, or None.
+    # Pass count_miss=False for a probe that is followed by another lookup for the same request,
+    # so each request counts as at most one miss.
+    def get(self, *keys, count_miss=True):
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                created, probabilities = entry
+                if now - created > self.ttl:
+                    del self._entries[key]
+                    self.counters['expirations'] += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return probabilities
+            db = self._connection()
+            if db is not None and keys:
+                # All probes in one query; the first key (in the order given) that has a fresh row wins
+                rows = {key: (created, blob) for key, created, blob in db.execute(
+                    f'SELECT key, created, probabilities FROM predictions WHERE model_version = ? '
+                    f'AND key IN ({", ".join("?" * len(keys))})', (self.model_version, *keys))}
+                for key in keys:
+                    if key not in rows or now - rows[key][0] > self.ttl:
+                        continue
+                    probabilities = np.frombuffer(rows[key][1], dtype=np.float32)
+                    self._store(key, rows[key][0], probabilities)
+                    self.counters['disk_hits'] += 1
+                    return probabilities
+            if count_miss:
+                self.counters['misses'] += 1
+            return None
+
+    # Store one probability vector under every given key
+    def put(self, keys, probabilities):
+        probabilities = np.array(probabilities, dtype=np.float32).reshape(-1)
+        probabilities.setflags(write=False)
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                self._store(key, now, probabilities)
+            db = self._connection()
+            if db is not None:
+                db.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)',
+                               [(key, self.model_version, now, probabilities.tobytes()) for key in keys])
+                # Trimming the disk tier scans the index, so only do it every few hundred writes
+                self._disk_writes += 1
+                if self._disk_writes % 256 == 0:
+                    db.execute('DELETE FROM predictions WHERE key IN (SELECT key FROM predictions '
+                               'ORDER BY created DESC LIMIT -1 OFFSET ?)', (self.max_disk_entries,))
+                db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute('DELETE FROM predictions')
+                db.commit()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), model_version=self.model_version)
+
+    def _store(self, key, created, probabilities):
+        self._entries[key] = (created, probabilities)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+
+# Shared cache for the whole process; set TEMPLE_CACHE_DB to a file path to keep predictions across restarts
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('TEMPLE_CACHE_SIZE', 4096)),
+    ttl_seconds=float(os.environ.get('TEMPLE_CACHE_TTL', 24 * 3600)),
+    disk_path=os.environ.get('TEMPLE_CACHE_DB'),
+)
@@ -0,0 +1,66 @@
+import numpy as np
+from PIL import Image, ImageOps
+
+import metrics
+
+# Input size expected by VGG16_model_75.h5
+IMAGE_SIZE = (150, 150)
+
+
+# Decode the upload once, as small as possible.
+# For JPEGs, draft mode lets libjpeg decode directly at 1/2, 1/4 or 1/8 scale while staying >= size,
+# so a 12 MP phone photo is decoded at roughly 500x375 instead of 4000x3000.
+def decode_image(uploaded_file, size=IMAGE_SIZE):
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+    image = Image.open(uploaded_file)
+    metrics.record_input_size(image.size)
+    image.draft('RGB', size)
+    return to_rgb(image)
+
+
+# Normalize palette, alpha and grayscale inputs to plain RGB in the same pass (transparent areas become white)
+def to_rgb(image):
+    if image.mode == 'RGB':
+        return image
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA', 'PA'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+# Center-crop and resize to the model input size.
+# Formats without draft support (e.g. large PNGs) are first shrunk by an integer factor so LANCZOS only
+# has to work on an image about twice the target size.
+def fit_image(image, size=IMAGE_SIZE):
+    factor = min(image.width // (2 * size[0]), image.height // (2 * size[1]))
+    if factor > 1:
+        image = image.reduce(factor)
+    return ImageOps.fit(image, size, Image.LANCZOS)
+
+
+# Rescale to [0, 1] straight into a float32 batch buffer of shape (1, H, W, 3), no float64 intermediate.
+# Pass `out` to reuse a preallocated buffer (or one row of a larger batch via out=batch[i:i+1]).
+def to_array(image, out=None):
+    if out is None:
+        out = np.empty((1, image.height, image.width, 3), dtype=np.float32)
+    np.multiply(np.asarray(image), np.float32(1 / 255.0), out=out[0])
+    return out
+
+
+# Decode once and return both the RGB image (for display) and the model-ready float32 batch
+def load_image(uploaded_file, size=IMAGE_SIZE, out=None):
+    with metrics.timed('decode'):
+        image = decode_image(uploaded_file, size)
+        image.load()
+    with metrics.timed('preprocess'):
+        return image, to_array(fit_image(image, size), out)
+
+
+# Define a function to preprocess the uploaded image
+def preprocess_image(uploaded_file, size=IMAGE_SIZE, out=None):
+    return load_image(uploaded_file, size, out)[1]
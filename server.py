@@ -0,0 +1,210 @@
+"""HTTP inference API for the temple classifier.
+
+    uvicorn server:app --host 0.0.0.0 --port 8000
+    python server.py --workers 4                # 4 worker processes on one socket, each with its own model copy
+
+Endpoints:
+    POST /predict          one image in the multipart field "file"
+    POST /predict/batch    several images in the multipart field "files"
+    GET  /healthz          the process is up
+    GET  /readyz           the model is loaded and warmed up (503 until then)
+    GET  /metrics          Prometheus metrics
+    GET  /profiling        switch the sampling profiler, e.g. /profiling?every=50&mode=cprofile (every=0 = off)
+
+The model loads in the background; requests that arrive earlier wait for it (up to TEMPLE_LOAD_WAIT seconds).
+
+Point the Streamlit app at it with TEMPLE_API_URL=http://host:8000.
+"""
+import argparse
+import asyncio
+import gc
+import io
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+import metrics
+from classifier import MODEL_PATH, class_names, prediction_cls
+from inference_scheduler import SchedulerFull, SchedulerStopped, get_scheduler
+from model_registry import registry
+from prediction_cache import content_key, prediction_cache, tensor_keys
+from preprocessing import preprocess_image
+
+# PIL releases the GIL while decoding and resizing, so a thread pool keeps decoding (and the registry and cache
+# I/O that goes with it) off the event loop
+decode_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('TEMPLE_DECODE_WORKERS', os.cpu_count() or 4)),
+                                 thread_name_prefix='decode')
+
+app = FastAPI(title='Cambodia Historical Temple Recognition')
+
+
+LOAD_WAIT_SECONDS = float(os.environ.get('TEMPLE_LOAD_WAIT', 120))
+
+# Future of the background model load, set when the server starts
+model_future = None
+
+
+@app.on_event('startup')
+def start_loading():
+    global model_future
+    model_future = registry.preload(MODEL_PATH)
+
+
+@app.get('/healthz')
+def healthz():
+    return {'status': 'ok'}
+
+
+@app.get('/readyz')
+def readyz():
+    if model_future is None or not model_future.done():
+        return JSONResponse({'status': 'loading'}, status_code=503)
+    if model_future.exception() is not None:
+        error = model_future.exception()
+        return JSONResponse({'status': 'error', 'error': f'{type(error).__name__}: {error}'}, status_code=503)
+    return {'status': 'ready', 'models': registry.stats()}
+
+
+# Requests that arrive while the model is loading wait for it instead of failing
+async def wait_for_model():
+    if not model_future.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(model_future)), LOAD_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            raise HTTPException(503, 'model is still loading')
+        except Exception:
+            pass  # reported below
+    if model_future.exception() is not None:
+        raise HTTPException(503, f'model could not be loaded: {model_future.exception()}')
+
+
+# Everything before the forward pass that can block: the registry (stat, and hash + reload when the model file
+# changed), swapping the scheduler for a reloaded model, the cache (sqlite when TEMPLE_CACHE_DB is set) and decoding.
+# Runs in decode_pool, never on the event loop.
+def prepare(data, filename):
+    # Sampled here, on the decode thread; the forward pass is sampled on the scheduler thread
+    with metrics.profiler.sample('predict'):
+        scheduler = get_scheduler(registry.get(MODEL_PATH))
+        prediction_cache.bind_model(registry.version(MODEL_PATH))
+        upload_key = content_key(data)
+        predictions = prediction_cache.get(upload_key, count_miss=False)
+        if predictions is not None:
+            return scheduler, [upload_key], None, predictions
+        try:
+            processed_image = preprocess_image(io.BytesIO(data))
+        except Exception as exc:
+            raise HTTPException(400, f'could not decode {filename}: {exc}')
+        image_keys = tensor_keys(processed_image)
+        return scheduler, [upload_key, *image_keys[:1]], processed_image, prediction_cache.get(*image_keys)
+
+
+# Same path as the Streamlit app: cache lookup, preprocess_image, micro-batched model.predict
+async def classify(data, filename):
+    await wait_for_model()
+    loop = asyncio.get_running_loop()
+    scheduler, keys, processed_image, predictions = await loop.run_in_executor(decode_pool, prepare, data, filename)
+    if predictions is None:
+        try:
+            future = scheduler.submit(processed_image, block=False)
+        except SchedulerFull as exc:
+            metrics.errors_total.inc(stage='queue_full')
+            raise HTTPException(503, str(exc))
+        except SchedulerStopped:
+            # The model was reloaded and its scheduler replaced between prepare() and here
+            metrics.errors_total.inc(stage='scheduler_stopped')
+            raise HTTPException(503, 'the model is being reloaded, please retry')
+        predictions = await asyncio.wrap_future(future)
+    await loop.run_in_executor(decode_pool, prediction_cache.put, keys, predictions)
+    predicted_class = prediction_cls(predictions, class_names)
+    metrics.record_prediction(predicted_class, float(max(predictions)))
+    return {
+        'filename': filename,
+        'predicted_class': predicted_class,
+        'probabilities': {name: float(p) for name, p in zip(class_names, predictions)},
+    }
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+
+@app.get('/profiling')
+def profiling(every: Optional[int] = None, mode: Optional[str] = None):
+    try:
+        return metrics.profiler.configure(every=every, mode=mode)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+@app.post('/predict')
+async def predict(file: UploadFile = File(...)):
+    return await classify(await file.read(), file.filename)
+
+
+@app.post('/predict/batch')
+async def predict_batch(files: List[UploadFile] = File(...)):
+    uploads = [(await file.read(), file.filename) for file in files]
+    # Every image is submitted before any is awaited, so the scheduler can put them in one batch
+    results = await asyncio.gather(*(classify(data, name) for data, name in uploads), return_exceptions=True)
+    for i, result in enumerate(results):
+        if isinstance(result, HTTPException):
+            results[i] = {'filename': uploads[i][1], 'error': result.detail}
+        elif isinstance(result, Exception):
+            raise result
+    return {'results': results}
+
+
+# Preforked workers sharing one listening socket. There is no shared model: TensorFlow (like onnxruntime) is not
+# fork-safe, since loading a model already starts the runtime and its thread pools, so the parent never loads one
+# and each worker loads and warms up its own full copy in its startup event. Memory grows with the worker count.
+def serve_preforked(host, port, workers):
+    import uvicorn
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    # Move everything allocated so far (imported modules, mostly) out of the garbage collector's reach, so
+    # collections in the workers don't write to (and thereby copy) the shared pages
+    gc.freeze()
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            uvicorn.Server(uvicorn.Config(app)).run(sockets=[sock])
+            os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for child in children:
+        os.waitpid(child, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the temple classifier over HTTP.')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.workers > 1:
+        serve_preforked(args.host, args.port, args.workers)
+    else:
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from inference_scheduler import BatchScheduler, SchedulerFull, SchedulerStopped
+
+
+def image(value):
+    return np.full((2, 2, 3), value, dtype=np.float32)
+
+
+# Batch function returning each image's first pixel, recording the batch sizes it was called with
+def recording_predict(sizes, delay=0.0, started=None):
+    def predict(batch):
+        sizes.append(len(batch))
+        if started is not None:
+            started.set()
+        time.sleep(delay)
+        return batch[:, 0, 0, :]
+    return predict
+
+
+def test_each_caller_gets_its_own_row():
+    scheduler = BatchScheduler(recording_predict([]), max_wait_ms=50)
+    futures = [scheduler.submit(image(i)) for i in range(5)]
+    assert [future.result(timeout=5)[0] for future in futures] == [0, 1, 2, 3, 4]
+    scheduler.stop()
+
+
+def test_flushes_when_the_batch_is_full():
+    sizes = []
+    scheduler = BatchScheduler(recording_predict(sizes), max_batch_size=4, max_wait_ms=10000)
+    futures = [scheduler.submit(image(i)) for i in range(8)]
+    for future in futures:
+        future.result(timeout=5)
+    assert sizes == [4, 4]
+    scheduler.stop()
+
+
+def test_flushes_a_partial_batch_after_max_wait():
+    sizes = []
+    scheduler = BatchScheduler(recording_predict(sizes), max_batch_size=16, max_wait_ms=20)
+    start = time.monotonic()
+    scheduler.submit(image(1)).result(timeout=5)
+    assert sizes == [1]
+    assert time.monotonic() - start < 1
+    scheduler.stop()
+
+
+def test_full_queue_raises_without_blocking():
+    started = threading.Event()
+    scheduler = BatchScheduler(recording_predict([], delay=0.3, started=started), max_batch_size=1, max_queue_size=2)
+    scheduler.submit(image(0))
+    assert started.wait(5)  # the worker holds the first image, the queue is empty again
+    scheduler.submit(image(1))
+    scheduler.submit(image(2))
+    with pytest.raises(SchedulerFull):
+        scheduler.submit(image(3), block=False)
+    with pytest.raises(SchedulerFull):
+        scheduler.submit(image(3), timeout=0.01)
+    scheduler.stop()
+
+
+def test_blocked_submit_proceeds_when_the_worker_makes_room():
+    started = threading.Event()
+    scheduler = BatchScheduler(recording_predict([], delay=0.1, started=started), max_batch_size=1, max_queue_size=1)
+    scheduler.submit(image(0))
+    assert started.wait(5)
+    scheduler.submit(image(1))
+    assert scheduler.submit(image(2), timeout=5).result(timeout=5)[0] == 2
+    scheduler.stop()
+
+
+def test_predict_errors_reach_every_caller_in_the_batch():
+    def failing(batch):
+        raise ValueError('bad batch')
+    scheduler = BatchScheduler(failing, max_wait_ms=50)
+    futures = [scheduler.submit(image(i)) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    scheduler.stop()
+
+
+def test_stop_drains_queued_requests_and_rejects_new_ones():
+    scheduler = BatchScheduler(recording_predict([], delay=0.05), max_batch_size=2)
+    futures = [scheduler.submit(image(i)) for i in range(6)]
+    scheduler.stop()
+    assert all(future.done() for future in futures)
+    with pytest.raises(SchedulerStopped):
+        scheduler.submit(image(0))
+
+
+def test_concurrent_submits_during_stop_never_hang():
+    scheduler = BatchScheduler(recording_predict([], delay=0.005), max_queue_size=4)
+    futures = []
+
+    def submit_many():
+        for _ in range(100):
+            try:
+                futures.append(scheduler.submit(image(0)))
+            except SchedulerStopped:
+                return
+
+    threads = [threading.Thread(target=submit_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    scheduler.stop()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert all(future.done() for future in futures)
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+from model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.content = f.read()
+
+
+def counting_loader(calls, delay=0.0):
+    def load(path):
+        calls.append(path)
+        time.sleep(delay)
+        return FakeModel(path)
+    return load
+
+
+def write(path, content, mtime=None):
+    path.write_bytes(content)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_same_file_is_loaded_once(tmp_path):
+    model_file = tmp_path / 'model.h5'
+    write(model_file, b'v1')
+    calls = []
+    registry = ModelRegistry(loader=counting_loader(calls), warmup=False)
+    assert registry.get(model_file) is registry.get(str(model_file))
+    assert len(calls) == 1
+
+
+def test_touched_file_with_same_content_is_not_reloaded(tmp_path):
+    model_file = tmp_path / 'model.h5'
+    write(model_file, b'v1', mtime=1_000_000_000)
+    calls = []
+    registry = ModelRegistry(loader=counting_loader(calls), warmup=False)
+    model = registry.get(model_file)
+    write(model_file, b'v1', mtime=2_000_000_000)
+    assert registry.get(model_file) is model
+    assert len(calls) == 1
+
+
+def test_changed_content_is_reloaded_with_a_new_version(tmp_path):
+    model_file = tmp_path / 'model.h5'
+    write(model_file, b'v1', mtime=1_000_000_000)
+    calls = []
+    registry = ModelRegistry(loader=counting_loader(calls), warmup=False)
+    version = registry.version(model_file)
+    write(model_file, b'v2', mtime=2_000_000_000)
+    assert registry.get(model_file).content == b'v2'
+    assert registry.version(model_file) != version
+    assert len(calls) == 2
+
+
+def test_least_recently_used_model_is_evicted(tmp_path):
+    paths = []
+    for name in ('a', 'b', 'c'):
+        paths.append(tmp_path / f'{name}.h5')
+        write(paths[-1], name.encode())
+    calls = []
+    registry = ModelRegistry(max_models=2, loader=counting_loader(calls), warmup=False)
+    registry.get(paths[0])
+    registry.get(paths[1])
+    registry.get(paths[0])  # b is now the least recently used
+    registry.get(paths[2])
+    assert sorted(os.path.basename(entry['path']) for entry in registry.stats()) == ['a.h5', 'c.h5']
+    registry.get(paths[0])
+    assert len(calls) == 3
+
+
+def test_concurrent_gets_load_once(tmp_path):
+    model_file = tmp_path / 'model.h5'
+    write(model_file, b'v1')
+    calls = []
+    registry = ModelRegistry(loader=counting_loader(calls, delay=0.2), warmup=False)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get(model_file))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(model is models[0] for model in models)
+
+
+def test_stats_do_not_wait_for_a_load_in_progress(tmp_path):
+    model_file = tmp_path / 'model.h5'
+    write(model_file, b'v1')
+    registry = ModelRegistry(loader=counting_loader([], delay=1.0), warmup=False)
+    future = registry.preload(model_file)
+    time.sleep(0.1)
+    start = time.perf_counter()
+    assert registry.stats() == []
+    assert time.perf_counter() - start < 0.5
+    assert future.result(timeout=5).content == b'v1'
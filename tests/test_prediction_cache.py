@@ -0,0 +1,90 @@
+import io
+import os
+
+from PIL import Image
+
+from prediction_cache import PredictionCache, content_key, tensor_keys
+from preprocessing import preprocess_image
+
+PHOTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'AngkorWat.png')
+
+
+def encode(image, format, **options):
+    data = io.BytesIO()
+    image.save(data, format, **options)
+    return data
+
+
+def test_reencoded_copies_hit_the_tensor_key():
+    photo = Image.open(PHOTO).convert('RGB')
+    cache = PredictionCache()
+    cache.bind_model('v1')
+    misses = 0
+    for offset in range(10):
+        image = photo.crop((offset * 5, offset * 3, photo.width - offset * 4, photo.height - offset * 2))
+        cache.put([tensor_keys(preprocess_image(encode(image, 'PNG')))[0]], [float(offset)])
+        jpeg = encode(image, 'JPEG', quality=92)
+        for copy in (encode(image, 'JPEG', quality=95), jpeg, encode(Image.open(jpeg), 'JPEG', quality=92)):
+            probabilities = cache.get(*tensor_keys(preprocess_image(copy)))
+            if probabilities is None or probabilities[0] != offset:
+                misses += 1
+    assert misses == 0
+
+
+def test_one_miss_per_request():
+    cache = PredictionCache()
+    cache.bind_model('v1')
+    assert cache.get(content_key(b'upload'), count_miss=False) is None
+    assert cache.get('t:0', 't:1') is None
+    assert cache.stats()['misses'] == 1
+    cache.put([content_key(b'upload'), 't:0'], [1.0])
+    assert cache.get(content_key(b'upload'), count_miss=False) is not None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_flat_images_get_no_tensor_key():
+    for colour in ((255, 0, 0), (0, 0, 0), (255, 255, 255), (40, 90, 200)):
+        assert tensor_keys(preprocess_image(encode(Image.new('RGB', (300, 200), colour), 'PNG'))) == []
+    for mode in ('RGBA', 'P'):
+        image = Image.new('RGB', (300, 200), (0, 128, 0)).convert(mode)
+        assert tensor_keys(preprocess_image(encode(image, 'PNG'))) == []
+
+
+def test_recoloured_copies_do_not_share_a_key():
+    photo = Image.open(PHOTO).convert('RGB')
+    original = set(tensor_keys(preprocess_image(encode(photo, 'PNG'))))
+    grayscale = photo.convert('L').convert('RGB')
+    darker = photo.point(lambda value: int(value * 0.8))
+    tinted = Image.merge('RGB', (photo.getchannel('B'), photo.getchannel('G'), photo.getchannel('R')))
+    for copy in (grayscale, darker, tinted):
+        assert original.isdisjoint(tensor_keys(preprocess_image(encode(copy, 'PNG'))))
+
+
+def test_structured_images_of_different_colours_do_not_share_a_key():
+    keys = []
+    for colour in ((255, 0, 0), (0, 0, 255), (128, 128, 128)):
+        image = Image.new('RGB', (300, 200), (0, 0, 0))
+        image.paste(Image.new('RGB', (150, 200), colour))  # left half coloured, right half black
+        keys.append(set(tensor_keys(preprocess_image(encode(image, 'PNG')))))
+        assert keys[-1]
+    assert all(a.isdisjoint(b) for i, a in enumerate(keys) for b in keys[i + 1:])
+
+
+def test_disk_tier_opens_its_own_connection_after_fork(tmp_path):
+    cache = PredictionCache(disk_path=str(tmp_path / 'cache.db'))
+    cache.bind_model('v1')
+    cache.put(['b:parent'], [1.0])
+    parent_connection = cache._connection()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ok = cache._connection() is not parent_connection and cache.get('b:parent') is not None
+        cache.put(['b:child'], [2.0])
+        os.write(write, b'1' if ok else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b'1'
+    assert cache._connection() is parent_connection
+    reopened = PredictionCache(disk_path=str(tmp_path / 'cache.db'))
+    reopened.bind_model('v1')
+    assert reopened.get('b:child') is not None
@@ -0,0 +1,191 @@
+"""Test-time augmentation: classify several crops/flips/scales of one photo in a single batched forward pass.
+
+Views are generated in priority order (the plain center fit first, so 1 view == the normal prediction), their
+softmax outputs are averaged (or max-pooled and renormalized), and AdaptiveTTA drops views whenever the recent
+p95 latency goes over the target.
+
+    python tta.py evaluate labelled_photos/ --views 1 2 4 8 12     # accuracy gained vs extra cost
+
+`evaluate` expects one sub-folder per class name (e.g. labelled_photos/Bayon/*.jpg).
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import ImageOps
+
+import metrics
+from classifier import MODEL_PATH, class_names
+from preprocessing import IMAGE_SIZE, decode_image, fit_image, to_array
+
+# (horizontal position, vertical position, scale of the short side, mirrored), most useful first.
+# Positions run from 0 (left/top) to 1 (right/bottom); scale 1.0 crops the largest square that fits.
+VIEWS = (
+    (0.5, 0.5, 1.0, False),   # center, same as preprocess_image
+    (0.5, 0.5, 1.0, True),
+    (0.0, 0.0, 1.0, False),   # start of the long axis: left side of wide shots, top of tall ones
+    (1.0, 1.0, 1.0, False),   # end of the long axis
+    (0.5, 0.5, 0.75, False),  # zoomed-in center
+    (0.0, 0.0, 0.8, False),   # corners
+    (1.0, 0.0, 0.8, False),
+    (0.0, 1.0, 0.8, False),
+    (1.0, 1.0, 0.8, False),
+    (0.0, 0.0, 1.0, True),
+    (1.0, 1.0, 1.0, True),
+    (0.5, 0.5, 0.75, True),
+)
+MAX_VIEWS = len(VIEWS)
+
+
+def crop_view(image, x, y, scale, mirrored, size=IMAGE_SIZE):
+    if (x, y, scale) == (0.5, 0.5, 1.0):
+        view = fit_image(image, size)  # pixel-identical to the single-view input
+    else:
+        side = int(min(image.size) * scale)
+        left = int(round((image.width - side) * x))
+        top = int(round((image.height - side) * y))
+        view = fit_image(image.crop((left, top, left + side, top + side)), size)
+    return ImageOps.mirror(view) if mirrored else view
+
+
+# The first `count` views as one float32 batch of shape (count, H, W, 3)
+def make_views(image, count, size=IMAGE_SIZE):
+    batch = np.empty((count,) + size + (3,), dtype=np.float32)
+    for i, view in enumerate(VIEWS[:count]):
+        to_array(crop_view(image, *view, size=size), out=batch[i:i + 1])
+    return batch
+
+
+def aggregate(probabilities, method='mean'):
+    if method == 'mean':
+        return probabilities.mean(axis=0)
+    if method == 'max':
+        pooled = probabilities.max(axis=0)
+        return pooled / pooled.sum()
+    raise ValueError(f'unknown aggregation {method!r}, expected mean or max')
+
+
+class AdaptiveTTA:
+    # Runs up to max_views views per image. With a target p95 latency, the view count is lowered while the p95 of
+    # the last `window` requests is over the target, and raised again once there is comfortable headroom.
+    def __init__(self, max_views=8, target_p95_ms=None, method='mean', window=50):
+        self.max_views = min(max_views, MAX_VIEWS)
+        self.target = target_p95_ms / 1000.0 if target_p95_ms else None
+        self.method = method
+        self.views = self.max_views
+        self.latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def predict(self, model, image):
+        count = self.views
+        start = time.perf_counter()
+        with metrics.timed('preprocess'):
+            batch = make_views(image, count)
+        metrics.batch_size.observe(count)
+        with metrics.timed('inference'):
+            probabilities = np.asarray(model.predict(batch, batch_size=count, verbose=0))
+        self._record(count, time.perf_counter() - start)
+        return aggregate(probabilities, self.method)
+
+    def _record(self, count, seconds):
+        if self.target is None:
+            return
+        with self._lock:
+            if count != self.views:
+                return  # measured with a view count that has already been changed
+            self.latencies.append(seconds)
+            if len(self.latencies) < min(10, self.latencies.maxlen):
+                return
+            p95 = float(np.percentile(self.latencies, 95))
+            if p95 > self.target and self.views > 1:
+                # Latency is roughly linear in the view count: jump straight to what should fit
+                self.views = max(1, min(self.views - 1, int(self.views * self.target / p95)))
+                self.latencies.clear()
+            elif p95 < 0.7 * self.target and self.views < self.max_views:
+                self.views += 1
+                self.latencies.clear()
+
+    def stats(self):
+        with self._lock:
+            p95 = float(np.percentile(self.latencies, 95)) * 1000 if self.latencies else None
+            return {'views': self.views, 'max_views': self.max_views, 'method': self.method,
+                    'target_p95_ms': self.target * 1000 if self.target else None, 'recent_p95_ms': p95}
+
+
+# Shared controller for the app. TEMPLE_TTA_VIEWS > 1 turns multi-crop mode on by default with that many views;
+# otherwise it stays off until switched on in the sidebar, where it uses up to 8 views
+TTA_VIEWS = int(os.environ.get('TEMPLE_TTA_VIEWS', 0))
+tta = AdaptiveTTA(max_views=TTA_VIEWS if TTA_VIEWS > 1 else 8,
+                  target_p95_ms=float(os.environ.get('TEMPLE_TTA_P95_MS', 0)) or None,
+                  method=os.environ.get('TEMPLE_TTA_AGGREGATE', 'mean'))
+enabled_by_default = TTA_VIEWS > 1
+
+
+def evaluate(args):
+    from model_registry import ModelRegistry
+    model = ModelRegistry(max_models=1).get(args.model)
+    samples = []
+    for label in class_names:
+        folder = os.path.join(args.data, label)
+        if os.path.isdir(folder):
+            samples += [(os.path.join(folder, name), class_names.index(label)) for name in sorted(os.listdir(folder))
+                        if name.lower().endswith(('.jpg', '.jpeg', '.png'))][:args.limit]
+    if not samples:
+        sys.exit(f'No images found in class folders under {args.data}')
+    # Decode up front (and close the files) so no view count pays the JPEG decode inside its timings
+    images = []
+    for path, label in samples:
+        with open(path, 'rb') as f:
+            image = decode_image(f)
+            image.load()
+        images.append((image, label))
+
+    # The single center crop is always measured, as the baseline every other view count is compared with
+    results = []
+    for count in sorted({1, *args.views}):
+        correct, latencies = 0, []
+        for image, label in images:
+            start = time.perf_counter()
+            probabilities = model.predict(make_views(image, count), batch_size=count, verbose=0)
+            prediction = aggregate(np.asarray(probabilities), args.aggregate)
+            latencies.append(time.perf_counter() - start)
+            correct += int(np.argmax(prediction) == label)
+        results.append({'views': count, 'accuracy': correct / len(images),
+                        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+                        'p95_ms': float(np.percentile(latencies, 95) * 1000)})
+    baseline = results[0]  # 1 view
+    for result in results:
+        result['accuracy_gain'] = result['accuracy'] - baseline['accuracy']
+        result['latency_factor'] = result['p95_ms'] / baseline['p95_ms']
+
+    if args.json:
+        print(json.dumps({'images': len(images), 'aggregate': args.aggregate, 'results': results}, indent=2))
+        return
+    print(f'{len(images)} images, {args.aggregate} aggregation')
+    for result in results:
+        print(f"{result['views']:3d} views  accuracy {result['accuracy']:.2%} ({result['accuracy_gain']:+.2%})  "
+              f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  ({result['latency_factor']:.1f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Test-time augmentation tools.')
+    parser.add_argument('--model', default=MODEL_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    evaluate_parser = commands.add_parser('evaluate', help='accuracy and latency per view count')
+    evaluate_parser.add_argument('data', help='folder with one sub-folder of images per class')
+    evaluate_parser.add_argument('--views', type=int, nargs='+', default=[1, 2, 4, 8, MAX_VIEWS],
+                                 choices=range(1, MAX_VIEWS + 1), metavar='N')
+    evaluate_parser.add_argument('--aggregate', choices=('mean', 'max'), default='mean')
+    evaluate_parser.add_argument('--limit', type=int, default=200, help='images per class')
+    evaluate_parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+    evaluate(args)
+
+
+if __name__ == '__main__':
+    main()